@@ -925,6 +925,11 @@ AVAILABLE TOOLS:
             return try await self.handleMCPToolExecution(req)
         }
 
+        /// Execute several MCP tools in one round-trip; results are returned in request order.
+        protected.post("debug", "mcp", "execute_batch") { req async throws -> [MCPExecutionResponse] in
+            return try await self.handleMCPToolBatchExecution(req)
+        }
+
         /// Debug endpoint to check tool registry (development only).
         protected.get("debug", "tools", "available") { _ async throws -> Response in
             return await MainActor.run {
@@ -2912,6 +2917,23 @@ AVAILABLE TOOLS:
         let request = try req.content.decode(MCPExecutionRequest.self)
         logger.info("SECURITY: MCP tool execution request - tool: \(request.toolName) from \(req.remoteAddress?.description ?? "unknown")")
 
+        return try await executeMCPRequest(request)
+    }
+
+    private func handleMCPToolBatchExecution(_ req: Request) async throws -> [MCPExecutionResponse] {
+        let requests = try req.content.decode([MCPExecutionRequest].self)
+        logger.info("SECURITY: MCP batch execution request - \(requests.count) tools: \(requests.map { $0.toolName }.joined(separator: ", ")) from \(req.remoteAddress?.description ?? "unknown")")
+
+        /// Execute sequentially so calls that depend on earlier side effects see them.
+        var responses: [MCPExecutionResponse] = []
+        responses.reserveCapacity(requests.count)
+        for request in requests {
+            responses.append(try await executeMCPRequest(request))
+        }
+        return responses
+    }
+
+    private func executeMCPRequest(_ request: MCPExecutionRequest) async throws -> MCPExecutionResponse {
         /// Parse parameters JSON.
         var parameters: [String: Any] = [:]
         if !request.parametersJson.isEmpty {
@@ -482,6 +482,7 @@ struct AdvancedEndpointsContent: View {
 
             EndpointCard(method: "GET", path: "/debug/mcp/tools", description: "List all MCP tools with schemas")
             EndpointCard(method: "POST", path: "/debug/mcp/execute", description: "Execute MCP tool directly")
+            EndpointCard(method: "POST", path: "/debug/mcp/execute_batch", description: "Execute several MCP tools in one request")
             EndpointCard(method: "GET", path: "/debug/tools/available", description: "Tool registry status")
 
             Text("Debug endpoints are for development only and may change without notice.")
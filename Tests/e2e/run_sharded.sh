@@ -0,0 +1,68 @@
+#!/usr/bin/env bash
+#
+# SAM MCP E2E Sharded Runner
+# ==========================
+#
+# Runs the MCP E2E suites as N parallel shards (each with its own workspace
+# and artifacts directory) and aggregates their JSON summaries.
+#
+# Usage:
+#   ./run_sharded.sh            # 4 shards
+#   ./run_sharded.sh 8          # 8 shards
+#   ./run_sharded.sh 4 --verbose
+#   ./run_sharded.sh --verbose  # 4 shards
+#
+# Per-shard logs are written to shard_logs/shard_<I>.log
+#
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+# A leading number is the shard count; anything else is passed to every shard
+SHARDS=4
+if [[ "${1:-}" =~ ^[0-9]+$ ]]; then
+    SHARDS=$((10#$1))
+    shift
+fi
+if (( SHARDS < 1 )); then
+    echo "Usage: $0 [N] [mcp_e2e_tests.py options...]  (N >= 1, default 4)" >&2
+    exit 2
+fi
+LOG_DIR="$SCRIPT_DIR/shard_logs"
+
+rm -rf "$LOG_DIR"
+mkdir -p "$LOG_DIR"
+
+# Fan out; individual shard failures are reported in the aggregate below
+seq 0 $((SHARDS - 1)) | xargs -P "$SHARDS" -I{} \
+    bash -c 'python3 "$0/mcp_e2e_tests.py" --shard "{}/$1" --summary-json "$2/shard_{}.json" "${@:3}" \
+        > "$2/shard_{}.log" 2>&1' "$SCRIPT_DIR" "$SHARDS" "$LOG_DIR" "$@" || true
+
+python3 - "$LOG_DIR" "$SHARDS" <<'PY'
+import json
+import sys
+from pathlib import Path
+
+log_dir, shards = Path(sys.argv[1]), int(sys.argv[2])
+totals = {"total": 0, "passed": 0, "failed": 0, "skipped": 0, "errors": 0}
+missing = []
+
+for index in range(shards):
+    summary_file = log_dir / f"shard_{index}.json"
+    if not summary_file.exists():
+        missing.append(index)
+        continue
+    for suite in json.loads(summary_file.read_text())["suites"]:
+        print(f"[shard {index}] {suite['name']}: {suite['passed']}/{suite['total']} "
+              f"(Failed: {suite['failed']}, Skipped: {suite['skipped']})")
+        for key in totals:
+            totals[key] += suite[key]
+
+print()
+for key, value in totals.items():
+    print(f"{key.capitalize() + ':':<10}{value}")
+for index in missing:
+    print(f"Shard {index} produced no summary; see {log_dir}/shard_{index}.log")
+
+sys.exit(0 if not missing and totals["failed"] == 0 and totals["errors"] == 0 else 1)
+PY
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Unit tests for scripts/train_lora_gguf.py helpers
+
+Usage:
+    python3 -m unittest discover -s Tests/scripts
+"""
+
+import json
+import math
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts"))
+
+import train_lora_gguf
+
+
+def write_adapter_config(adapter_dir: Path, **config) -> Path:
+    config_path = adapter_dir / "adapter_config.json"
+    config_path.write_text(json.dumps(config))
+    return config_path
+
+
+class FoldRsloraScalingTests(unittest.TestCase):
+    """The exported adapter must keep the scale it was trained with"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.adapter_dir = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_rslora_scale_survives_llama_cpp_alpha_over_r(self):
+        rank, alpha = 16, 16.0
+        config_path = write_adapter_config(self.adapter_dir, r=rank, lora_alpha=alpha, use_rslora=True)
+
+        train_lora_gguf.fold_rslora_scaling(self.adapter_dir)
+
+        config = json.loads(config_path.read_text())
+        # llama.cpp (and PEFT without rslora) scale by lora_alpha / r
+        self.assertAlmostEqual(config["lora_alpha"] / config["r"], alpha / math.sqrt(rank))
+        self.assertFalse(config["use_rslora"])
+
+    def test_plain_lora_config_is_left_alone(self):
+        config_path = write_adapter_config(self.adapter_dir, r=8, lora_alpha=16.0, use_rslora=False)
+        before = config_path.read_text()
+
+        train_lora_gguf.fold_rslora_scaling(self.adapter_dir)
+
+        self.assertEqual(config_path.read_text(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
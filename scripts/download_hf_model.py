@@ -10,9 +10,16 @@ Usage:
 """
 
 import argparse
+import importlib.util
+import os
 import sys
 from pathlib import Path
 
+# Use the multi-connection hf_transfer backend when it is installed. The hub reads
+# this setting at import time, so --no-parallel has to be checked before importing.
+if importlib.util.find_spec("hf_transfer") is not None and "--no-parallel" not in sys.argv[1:]:
+    os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
+
 try:
     from huggingface_hub import snapshot_download
 except ImportError:
@@ -20,7 +27,7 @@ except ImportError:
     print("Install with: pip install huggingface-hub", file=sys.stderr)
     sys.exit(1)
 
-def download_model(repo_id: str, output_dir: str, token: str = None):
+def download_model(repo_id: str, output_dir: str, token: str = None, parallel: bool = True):
     """Download HuggingFace model repository"""
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
@@ -33,7 +40,9 @@ def download_model(repo_id: str, output_dir: str, token: str = None):
             repo_id=repo_id,
             local_dir=output_dir,
             local_dir_use_symlinks=False,
-            token=token
+            token=token,
+            max_workers=min(8, os.cpu_count() or 4) if parallel else 1,
+            etag_timeout=30
         )
         print(f"SUCCESS: Model downloaded to {output_dir}")
         return 0
@@ -46,6 +55,8 @@ if __name__ == "__main__":
     parser.add_argument("--repo", required=True, help="Repository ID (e.g., Tongyi-MAI/Z-Image-Turbo)")
     parser.add_argument("--output", required=True, help="Output directory")
     parser.add_argument("--token", help="HuggingFace API token (optional)")
+    parser.add_argument("--no-parallel", action="store_true",
+                        help="Download one file at a time without hf_transfer (for debugging)")
     
     args = parser.parse_args()
-    sys.exit(download_model(args.repo, args.output, args.token))
+    sys.exit(download_model(args.repo, args.output, args.token, parallel=not args.no_parallel))
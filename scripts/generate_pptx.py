@@ -27,6 +27,12 @@ except ImportError as e:
     logging.error("Install with: pip install python-pptx")
     sys.exit(1)
 
+# Slide geometry and font sizes are the same for every slide
+TITLE_BOX_POS = (Inches(0.5), Inches(0.2), Inches(9), Inches(0.8))
+IMAGE_POS = (Inches(1), Inches(1.5), Inches(8))
+TITLE_FONT_SIZE = Pt(28)
+BULLET_FONT_SIZE = Pt(18)
+
 
 def create_presentation(data):
     """
@@ -57,6 +63,11 @@ def create_presentation(data):
         logging.info("Creating blank presentation")
         prs = Presentation()
     
+    # Resolve layouts once rather than per slide
+    blank_layout = prs.slide_layouts[6]  # Blank
+    title_content_layout = prs.slide_layouts[1]  # Title and Content
+    title_only_layout = prs.slide_layouts[5]  # Title Only
+    
     slides_data = data.get("slides", [])
     logging.info(f"Processing {len(slides_data)} slides")
     
@@ -69,18 +80,15 @@ def create_presentation(data):
         
         if has_image:
             # Image slide - use blank layout
-            slide_layout = prs.slide_layouts[6]  # Blank
-            slide = prs.slides.add_slide(slide_layout)
+            slide = prs.slides.add_slide(blank_layout)
             
             # Add title text box (optional)
             if slide_data.get("title"):
-                title_box = slide.shapes.add_textbox(
-                    Inches(0.5), Inches(0.2),
-                    width=Inches(9), height=Inches(0.8)
-                )
+                left, top, width, height = TITLE_BOX_POS
+                title_box = slide.shapes.add_textbox(left, top, width=width, height=height)
                 title_frame = title_box.text_frame
                 title_frame.text = slide_data["title"]
-                title_frame.paragraphs[0].font.size = Pt(28)
+                title_frame.paragraphs[0].font.size = TITLE_FONT_SIZE
                 title_frame.paragraphs[0].font.bold = True
                 title_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
             
@@ -89,11 +97,8 @@ def create_presentation(data):
             if Path(image_path).exists():
                 try:
                     # Center image on slide
-                    slide.shapes.add_picture(
-                        image_path,
-                        Inches(1), Inches(1.5),
-                        width=Inches(8)
-                    )
+                    left, top, width = IMAGE_POS
+                    slide.shapes.add_picture(image_path, left, top, width=width)
                     logging.debug(f"Added image: {image_path}")
                 except Exception as e:
                     logging.error(f"Failed to add image {image_path}: {e}")
@@ -102,8 +107,7 @@ def create_presentation(data):
         
         elif has_content:
             # Content slide - use title and content layout
-            slide_layout = prs.slide_layouts[1]  # Title and Content
-            slide = prs.slides.add_slide(slide_layout)
+            slide = prs.slides.add_slide(title_content_layout)
             
             # Set title
             title = slide.shapes.title
@@ -124,12 +128,11 @@ def create_presentation(data):
                 
                 p.text = line
                 p.level = 0  # Top-level bullet
-                p.font.size = Pt(18)
+                p.font.size = BULLET_FONT_SIZE
         
         else:
             # Title-only slide
-            slide_layout = prs.slide_layouts[5]  # Title Only
-            slide = prs.slides.add_slide(slide_layout)
+            slide = prs.slides.add_slide(title_only_layout)
             
             title = slide.shapes.title
             title.text = slide_data.get("title", "")
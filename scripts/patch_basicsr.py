@@ -11,9 +11,14 @@ but in torchvision 0.17.0+ it's torchvision.transforms._functional_tensor (with
 This script patches the import statement in basicsr's degradations.py
 """
 
+import ast
+import mmap
 import sys
 from pathlib import Path
 
+OLD_MODULE = "torchvision.transforms.functional_tensor"
+NEW_MODULE = "torchvision.transforms._functional_tensor"
+
 def patch_basicsr(python_env_path: str):
     """Patch basicsr to use correct torchvision import."""
     
@@ -25,25 +30,38 @@ def patch_basicsr(python_env_path: str):
         print(f"ERROR: Could not find {degradations_file}")
         return False
     
-    # Read file
-    content = degradations_file.read_text()
+    # Check if already patched without decoding the whole file
+    with degradations_file.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm.find(OLD_MODULE.encode()) == -1 and mm.find(NEW_MODULE.encode()) != -1:
+            print("✓ basicsr already patched for torchvision compatibility")
+            return True
+        content = mm[:].decode()
+    
+    # Find the import via the AST so formatting differences don't matter
+    tree = ast.parse(content)
+    imports = [
+        node for node in ast.walk(tree)
+        if isinstance(node, ast.ImportFrom) and node.module in (OLD_MODULE, NEW_MODULE)
+    ]
     
     # Check if already patched
-    if "from torchvision.transforms._functional_tensor import rgb_to_grayscale" in content:
+    if imports and all(node.module == NEW_MODULE for node in imports):
         print("✓ basicsr already patched for torchvision compatibility")
         return True
     
-    # Apply patch
-    old_import = "from torchvision.transforms.functional_tensor import rgb_to_grayscale"
-    new_import = "from torchvision.transforms._functional_tensor import rgb_to_grayscale"
-    
-    if old_import not in content:
+    if not imports:
         print(f"WARNING: Expected import not found in {degradations_file}")
         print(f"File might already be patched or have a different structure")
         return True
     
-    # Replace the import
-    patched_content = content.replace(old_import, new_import)
+    # Rewrite only the source lines of the matching import statements
+    lines = content.splitlines(keepends=True)
+    for node in imports:
+        if node.module == OLD_MODULE:
+            start, end = node.lineno - 1, node.end_lineno
+            segment = "".join(lines[start:end]).replace(OLD_MODULE, NEW_MODULE, 1)
+            lines[start:end] = [segment]
+    patched_content = "".join(lines)
     
     # Write back
     degradations_file.write_text(patched_content)
@@ -9,11 +9,43 @@ The issue: dpm_solver_first_order_update accesses self.sigmas[self.step_index +
 without bounds checking, causing IndexError when step_index equals len(sigmas) - 1
 
 The fix: Add bounds check and use final sigma when at boundary
+
+The assignment is located with the ast module rather than an exact string
+match, so the patch keeps working when upstream reformats the line.
 """
 
+import ast
+import mmap
 import sys
 from pathlib import Path
 
+
+def _find_sigma_assignment(tree: ast.Module):
+    """Locate the unguarded `sigma_t, sigma_s = ...` assignment.
+
+    Returns (node, already_guarded). node is None when the function or
+    assignment is not present in this diffusers version.
+    """
+    for func in ast.walk(tree):
+        if isinstance(func, ast.FunctionDef) and func.name == "dpm_solver_first_order_update":
+            break
+    else:
+        return None, False
+
+    for node in ast.walk(func):
+        # Guard is `if self.step_index + 1 >= len(self.sigmas): ...`
+        if isinstance(node, ast.If) and "len(self.sigmas)" in ast.unparse(node.test):
+            return None, True
+    for node in ast.walk(func):
+        if (
+            isinstance(node, ast.Assign)
+            and isinstance(node.targets[0], ast.Tuple)
+            and [getattr(t, "id", None) for t in node.targets[0].elts] == ["sigma_t", "sigma_s"]
+            and "self.sigmas[self.step_index + 1]" in ast.unparse(node.value)
+        ):
+            return node, False
+    return None, False
+
 def patch_dpmsolver(python_env_path: str):
     """Patch diffusers DPMSolverMultistepScheduler IndexError bug."""
     
@@ -25,34 +57,43 @@ def patch_dpmsolver(python_env_path: str):
         print(f"ERROR: Could not find {scheduler_file}")
         return False
     
-    # Read file
-    content = scheduler_file.read_text()
+    # Check if already patched without decoding the whole file
+    with scheduler_file.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm.find(b"# SAM PATCH: bounds check") != -1:
+            print("✓ diffusers DPMSolver already patched for IndexError fix")
+            return True
+        content = mm[:].decode()
     
-    # Check if already patched
-    if "# SAM PATCH: bounds check" in content:
-        print("✓ diffusers DPMSolver already patched for IndexError fix")
+    # Locate the assignment via the AST so upstream formatting changes don't matter
+    node, guarded = _find_sigma_assignment(ast.parse(content))
+    if guarded:
+        print("✓ diffusers DPMSolver already has a sigma bounds check")
         return True
-    
-    # Apply patch to line 856
-    old_line = "        sigma_t, sigma_s = self.sigmas[self.step_index + 1], self.sigmas[self.step_index]"
-    new_lines = """        # SAM PATCH: bounds check to prevent IndexError
-        # Original issue: step_index + 1 can exceed sigma array bounds
-        if self.step_index + 1 >= len(self.sigmas):
-            # At final step, use last sigma
-            sigma_t = self.sigmas[-1]
-            sigma_s = self.sigmas[self.step_index]
-        else:
-            sigma_t, sigma_s = self.sigmas[self.step_index + 1], self.sigmas[self.step_index]"""
-    
-    if old_line not in content:
-        print(f"WARNING: Expected line not found in {scheduler_file}")
+    if node is None:
+        print(f"WARNING: Expected assignment not found in {scheduler_file}")
         print(f"File might already be patched or have a different version")
         return True
     
-    # Replace the line
-    patched_content = content.replace(old_line, new_lines)
+    indent = " " * node.col_offset
+    new_lines = [
+        "# SAM PATCH: bounds check to prevent IndexError",
+        "# Original issue: step_index + 1 can exceed sigma array bounds",
+        "if self.step_index + 1 >= len(self.sigmas):",
+        "    # At final step, use last sigma",
+        "    sigma_t = self.sigmas[-1]",
+        "    sigma_s = self.sigmas[self.step_index]",
+        "else:",
+        "    sigma_t, sigma_s = self.sigmas[self.step_index + 1], self.sigmas[self.step_index]",
+    ]
     
-    # Write back
+    # Splice only the assignment's source lines; comments elsewhere are kept
+    lines = content.splitlines(keepends=True)
+    lines[node.lineno - 1:node.end_lineno] = [indent + line + "\n" for line in new_lines]
+    patched_content = "".join(lines)
+    
+    # Write back only when something changed, so mtime stays stable
+    if patched_content == content:
+        return True
     scheduler_file.write_text(patched_content)
     print(f"✓ Patched diffusers DPMSolver at {scheduler_file}")
     print(f"  Added bounds check to prevent IndexError")
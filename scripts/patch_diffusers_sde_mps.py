@@ -8,13 +8,201 @@ Issue: SDE schedulers have two problems on MPS:
 
 Fix:
 1. Generate noise on CPU, then move to MPS
-2. Clamp sqrt inputs to be non-negative to prevent NaN
+2. Compute sqrt inputs with expm1 so they stay non-negative and accurate
+
+Preferred usage is the runtime patch, which needs no file I/O and does not
+depend on the upstream source formatting:
+
+    import patch_diffusers_sde_mps
+    patch_diffusers_sde_mps.install()
+
+Running this file as a script still rewrites scheduling_dpmsolver_multistep.py
+on disk for environments that cannot import the runtime patch.
 """
 
+import math
+import mmap
 import sys
 import re
 from pathlib import Path
 
+SDE_ALGORITHMS = ("sde-dpmsolver", "sde-dpmsolver++")
+
+# Noise generation in step() (flexible to formatting variations)
+NOISE_PATTERN = re.compile(
+    r'if self\.config\.algorithm_type in \["sde-dpmsolver", "sde-dpmsolver\+\+"\] and variance_noise is None:\s+'
+    r'noise = randn_tensor\(\s*'
+    r'model_output\.shape,\s*'
+    r'generator=generator,\s*'
+    r'device=model_output\.device,\s*'
+    r'dtype=torch\.float32,?\s*'
+    r'\)',
+    re.MULTILINE | re.DOTALL
+)
+
+# sqrt term of the sde-dpmsolver++ first order update
+SDE_PP_PATTERN = re.compile(
+    r'elif self\.config\.algorithm_type == "sde-dpmsolver\+\+":\s+'
+    r'assert noise is not None\s+'
+    r'x_t = \(\s*'
+    r'\(sigma_t / sigma_s \* torch\.exp\(-h\)\) \* sample\s*\+\s*'
+    r'\(alpha_t \* \(1 - torch\.exp\(-2\.0 \* h\)\)\) \* model_output\s*\+\s*'
+    r'sigma_t \* torch\.sqrt\(1\.0 - torch\.exp\(-2 \* h\)\) \* noise\s*'
+    r'\)',
+    re.MULTILINE | re.DOTALL
+)
+
+# sqrt term of the sde-dpmsolver first order update
+SDE_PATTERN = re.compile(
+    r'elif self\.config\.algorithm_type == "sde-dpmsolver":\s+'
+    r'assert noise is not None\s+'
+    r'x_t = \(\s*'
+    r'\(alpha_t / alpha_s\) \* sample\s*-\s*'
+    r'2\.0 \* \(sigma_t \* \(torch\.exp\(h\) - 1\.0\)\) \* model_output\s*\+\s*'
+    r'sigma_t \* torch\.sqrt\(torch\.exp\(2 \* h\) - 1\.0\) \* noise\s*'
+    r'\)',
+    re.MULTILINE | re.DOTALL
+)
+
+
+def install(device_noise: bool = False) -> bool:
+    """
+    Patch DPMSolverMultistepScheduler in memory to fix SDE on MPS.
+    
+    Wraps step() so SDE noise is drawn on CPU and overrides the first order
+    update so the sqrt inputs use expm1. The sqrt terms are
+    precomputed per step in set_timesteps(). Safe to call more than once.
+    
+    Args:
+        device_noise: Draw the run's noise on MPS as one flat 1-D randn
+            instead of on CPU. Only the multi-dimensional MPS randn is
+            affected by the RNG bug; a flat draw viewed as (steps, *shape)
+            avoids it and skips the per-step host-to-device copy. Used only
+            when the generator is None or an MPS generator.
+    
+    Returns:
+        True if the patch is installed, False if diffusers is unavailable
+    """
+    try:
+        import torch
+        from diffusers.schedulers.scheduling_dpmsolver_multistep import DPMSolverMultistepScheduler
+        from diffusers.utils.torch_utils import randn_tensor
+    except ImportError as e:
+        print(f"WARNING: Could not import diffusers scheduler: {e}")
+        return False
+    
+    cls = DPMSolverMultistepScheduler
+    if getattr(cls, "_sam_mps_patched", False):
+        return True
+    
+    orig_set_timesteps = cls.set_timesteps
+    orig_step = cls.step
+    orig_first_order_update = cls.dpm_solver_first_order_update
+    
+    def _sqrt_coefficients(self, h):
+        # MPS PRECISION FIX: expm1 keeps the sqrt input non-negative for h >= 0
+        # and avoids the cancellation in 1 - exp(-2h) that produced NaN
+        if self.config.algorithm_type == "sde-dpmsolver++":
+            return torch.sqrt(-torch.expm1(-2 * h))
+        return torch.sqrt(torch.expm1(2 * h))
+    
+    def set_timesteps(self, *args, **kwargs):
+        result = orig_set_timesteps(self, *args, **kwargs)
+        self._sam_sqrt_coef = None
+        if self.config.algorithm_type in SDE_ALGORITHMS:
+            # h depends only on the sigma schedule, so the sqrt noise
+            # coefficient for every step can be computed once per run
+            alpha, sigma = self._sigma_to_alpha_sigma_t(self.sigmas)
+            lambdas = torch.log(alpha) - torch.log(sigma)
+            h = torch.cat([lambdas[1:] - lambdas[:-1], lambdas.new_zeros(1)])
+            self._sam_sqrt_coef = _sqrt_coefficients(self, h)
+        return result
+    
+    def _pooled_noise(self, model_output, generator):
+        # Per-sample generators are batch-indexed by randn_tensor, so they
+        # cannot share a pool laid out by step
+        if isinstance(generator, list):
+            return randn_tensor(
+                model_output.shape, generator=generator, device=torch.device("cpu"), dtype=torch.float32
+            )
+        
+        # Draw noise for every remaining step in one RNG call at the start of
+        # a run, then hand out one slice per step
+        on_device = device_noise and (generator is None or generator.device.type == "mps")
+        index = 0 if self.step_index is None else self.step_index
+        pool = getattr(self, "_sam_noise_pool", None)
+        offset = getattr(self, "_sam_noise_offset", 0)
+        if (
+            index == 0
+            or pool is None
+            or pool.shape[1:] != model_output.shape
+            or pool.device.type != ("mps" if on_device else "cpu")
+            or not 0 <= index - offset < len(pool)
+        ):
+            shape = (max(len(self.timesteps) - index, 1), *model_output.shape)
+            if on_device:
+                pool = torch.randn(
+                    math.prod(shape), generator=generator, device=model_output.device, dtype=torch.float32
+                ).view(shape)
+            else:
+                pool = randn_tensor(
+                    shape,
+                    generator=generator,
+                    device=torch.device("cpu"),
+                    dtype=torch.float32,
+                )
+            self._sam_noise_pool = pool
+            self._sam_noise_offset = index
+        return pool[index - self._sam_noise_offset]
+    
+    def step(self, model_output, timestep, sample, generator=None, variance_noise=None, return_dict=True):
+        # MPS RNG FIX: supply pooled noise so diffusers skips its MPS randn
+        if (
+            self.config.algorithm_type in SDE_ALGORITHMS
+            and variance_noise is None
+            and model_output.device.type == "mps"
+        ):
+            variance_noise = _pooled_noise(self, model_output, generator).to(model_output.device, non_blocking=True)
+        return orig_step(
+            self, model_output, timestep, sample,
+            generator=generator, variance_noise=variance_noise, return_dict=return_dict,
+        )
+    
+    def dpm_solver_first_order_update(self, model_output, *args, sample=None, noise=None, **kwargs):
+        if self.config.algorithm_type not in SDE_ALGORITHMS or sample is None or args:
+            return orig_first_order_update(self, model_output, *args, sample=sample, noise=noise, **kwargs)
+        assert noise is not None
+        
+        next_index = min(self.step_index + 1, len(self.sigmas) - 1)
+        alpha_t, sigma_t = self._sigma_to_alpha_sigma_t(self.sigmas[next_index])
+        alpha_s, sigma_s = self._sigma_to_alpha_sigma_t(self.sigmas[self.step_index])
+        h = (torch.log(alpha_t) - torch.log(sigma_t)) - (torch.log(alpha_s) - torch.log(sigma_s))
+        
+        sqrt_coef = getattr(self, "_sam_sqrt_coef", None)
+        if sqrt_coef is None or next_index == self.step_index:
+            sqrt_coef = _sqrt_coefficients(self, h)
+        else:
+            sqrt_coef = sqrt_coef[self.step_index]
+        
+        # The coefficients are CPU scalars from the sigma schedule; folding them
+        # into add(alpha=...) needs 3 elementwise kernels on the latents instead of 5
+        if self.config.algorithm_type == "sde-dpmsolver++":
+            sample_coef = (sigma_t / sigma_s * torch.exp(-h)).item()
+            model_output_coef = (alpha_t * (1 - torch.exp(-2.0 * h))).item()
+        else:
+            sample_coef = (alpha_t / alpha_s).item()
+            model_output_coef = (-2.0 * (sigma_t * (torch.exp(h) - 1.0))).item()
+        noise_coef = (sigma_t * sqrt_coef).item()
+        
+        x_t = torch.add(sample * sample_coef, model_output, alpha=model_output_coef)
+        return torch.add(x_t, noise, alpha=noise_coef)
+    
+    cls.set_timesteps = set_timesteps
+    cls.step = step
+    cls.dpm_solver_first_order_update = dpm_solver_first_order_update
+    cls._sam_mps_patched = True
+    return True
+
 
 def patch_dpmsolver_sde_for_mps(scheduler_file: Path) -> bool:
     """
@@ -30,26 +218,14 @@ def patch_dpmsolver_sde_for_mps(scheduler_file: Path) -> bool:
         print(f"ERROR: Scheduler file not found: {scheduler_file}")
         return False
     
-    # Read the file
-    content = scheduler_file.read_text()
-    
-    # Check if already patched
-    if "# MPS RNG FIX:" in content:
-        print(f" Scheduler already patched: {scheduler_file}")
-        return True
-    
-    # Patch 1: Fix noise generation (more flexible regex to handle formatting variations)
-    noise_pattern = re.compile(
-        r'if self\.config\.algorithm_type in \["sde-dpmsolver", "sde-dpmsolver\+\+"\] and variance_noise is None:\s+'
-        r'noise = randn_tensor\(\s*'
-        r'model_output\.shape,\s*'
-        r'generator=generator,\s*'
-        r'device=model_output\.device,\s*'
-        r'dtype=torch\.float32,?\s*'
-        r'\)',
-        re.MULTILINE | re.DOTALL
-    )
+    # Check if already patched without decoding the whole file
+    with scheduler_file.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm.find(b"# MPS RNG FIX:") != -1:
+            print(f" Scheduler already patched: {scheduler_file}")
+            return True
+        content = mm[:].decode()
     
+    # Patch 1: Fix noise generation
     patched_noise = """if self.config.algorithm_type in ["sde-dpmsolver", "sde-dpmsolver++"] and variance_noise is None:
             # MPS RNG FIX: Generate noise on CPU to avoid MPS precision issues
             noise_device = "cpu" if str(model_output.device) == "mps" else model_output.device
@@ -63,75 +239,51 @@ def patch_dpmsolver_sde_for_mps(scheduler_file: Path) -> bool:
             if noise_device == "cpu" and model_output.device != "cpu":
                 noise = noise.to(device=model_output.device)"""
     
-    if not noise_pattern.search(content):
+    # Each block occurs once, so a single subn both finds and replaces it
+    content, count = NOISE_PATTERN.subn(patched_noise, content, count=1)
+    if count == 0:
         print(f"WARNING: Could not find noise generation code in expected format")
         print(f"This patch may not be needed for this diffusers version")
         # Don't fail - maybe the code changed or was already fixed upstream
         return True
     
-    content = noise_pattern.sub(patched_noise, content)
-    
     # Patch 2: Fix sqrt operations in sde-dpmsolver++
-    sde_pp_pattern = re.compile(
-        r'elif self\.config\.algorithm_type == "sde-dpmsolver\+\+":\s+'
-        r'assert noise is not None\s+'
-        r'x_t = \(\s*'
-        r'\(sigma_t / sigma_s \* torch\.exp\(-h\)\) \* sample\s*\+\s*'
-        r'\(alpha_t \* \(1 - torch\.exp\(-2\.0 \* h\)\)\) \* model_output\s*\+\s*'
-        r'sigma_t \* torch\.sqrt\(1\.0 - torch\.exp\(-2 \* h\)\) \* noise\s*'
-        r'\)',
-        re.MULTILINE | re.DOTALL
-    )
-    
     patched_sde_pp = """elif self.config.algorithm_type == "sde-dpmsolver++":
             assert noise is not None
-            # MPS PRECISION FIX: Clamp sqrt input to prevent NaN from precision errors
-            sqrt_input = torch.clamp(1.0 - torch.exp(-2 * h), min=0.0)
+            # MPS PRECISION FIX: expm1 avoids the cancellation that produced NaN
+            sqrt_input = -torch.expm1(-2 * h)
             x_t = (
                 (sigma_t / sigma_s * torch.exp(-h)) * sample
                 + (alpha_t * (1 - torch.exp(-2.0 * h))) * model_output
                 + sigma_t * torch.sqrt(sqrt_input) * noise
             )"""
     
-    if not sde_pp_pattern.search(content):
+    content, count = SDE_PP_PATTERN.subn(patched_sde_pp, content, count=1)
+    if count == 0:
         print(f"WARNING: Could not find sde-dpmsolver++ code in expected format")
         # Don't fail - keep going
-    else:
-        content = sde_pp_pattern.sub(patched_sde_pp, content)
     
     # Patch 3: Fix sqrt operations in sde-dpmsolver
-    sde_pattern = re.compile(
-        r'elif self\.config\.algorithm_type == "sde-dpmsolver":\s+'
-        r'assert noise is not None\s+'
-        r'x_t = \(\s*'
-        r'\(alpha_t / alpha_s\) \* sample\s*-\s*'
-        r'2\.0 \* \(sigma_t \* \(torch\.exp\(h\) - 1\.0\)\) \* model_output\s*\+\s*'
-        r'sigma_t \* torch\.sqrt\(torch\.exp\(2 \* h\) - 1\.0\) \* noise\s*'
-        r'\)',
-        re.MULTILINE | re.DOTALL
-    )
-    
     patched_sde = """elif self.config.algorithm_type == "sde-dpmsolver":
             assert noise is not None
-            # MPS PRECISION FIX: Clamp sqrt input to prevent NaN from precision errors
-            sqrt_input = torch.clamp(torch.exp(2 * h) - 1.0, min=0.0)
+            # MPS PRECISION FIX: expm1 avoids the cancellation that produced NaN
+            sqrt_input = torch.expm1(2 * h)
             x_t = (
                 (alpha_t / alpha_s) * sample
                 - 2.0 * (sigma_t * (torch.exp(h) - 1.0)) * model_output
                 + sigma_t * torch.sqrt(sqrt_input) * noise
             )"""
     
-    if not sde_pattern.search(content):
+    content, count = SDE_PATTERN.subn(patched_sde, content, count=1)
+    if count == 0:
         print(f"WARNING: Could not find sde-dpmsolver code in expected format")
         # Don't fail - keep going
-    else:
-        content = sde_pattern.sub(patched_sde, content)
     
     # Write back
     scheduler_file.write_text(content)
     print(f" Patched diffusers DPMSolver SDE for MPS")
     print(f"  Fixed: 1) CPU RNG for noise generation on MPS")
-    print(f"  Fixed: 2) Clamped sqrt inputs to prevent NaN in SDE math")
+    print(f"  Fixed: 2) expm1 sqrt inputs to prevent NaN in SDE math")
     
     return True
 
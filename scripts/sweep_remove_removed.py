@@ -2,72 +2,139 @@
 # SPDX-License-Identifier: GPL-3.0-only
 # SPDX-FileCopyrightText: Copyright (c) 2025 Andrew Wyatt (Fewtarius)
 
+import argparse
+import json
+import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Optional
 
 ROOT = Path(__file__).resolve().parents[1]
 TARGET_DIRS = [ROOT / 'Sources', ROOT / 'Tests']
+# path -> st_mtime_ns of each file as last swept
+CACHE_FILE = Path(__file__).resolve().parent / '.sweep_cache.json'
 
 # Match block comments containing the word 'removed' (case-insensitive)
 block_re = re.compile(r'/\*[\s\S]*?\*/', re.IGNORECASE)
-# Match single-line comments containing the word 'removed'
-single_re = re.compile(r'//+.*\bremoved\b.*', re.IGNORECASE)
-# Match inline comment start position
-inline_start_re = re.compile(r'//+')
-
-changed_files = []
-
-for base in TARGET_DIRS:
-    if not base.exists():
-        continue
-    for path in base.rglob('*.swift'):
-        text = path.read_text(encoding='utf-8')
-        orig = text
-        modified = False
-
-        # Remove entire block comments that contain 'removed'
-        def block_repl(m):
-            content = m.group(0)
-            if re.search(r'\bremoved\b', content, re.IGNORECASE):
-                return ''
-            return content
+# Match the word 'removed' itself
+removed_re = re.compile(r'\bremoved\b', re.IGNORECASE)
 
+
+def process_file(path: Path, dry_run: bool = False) -> Optional[str]:
+    """Sweep one file, returning its repo-relative path if it was (or would be) modified."""
+    data = path.read_bytes()
+    # Most files never mention the word; skip decoding and regex work
+    if b'removed' not in data.lower():
+        return None
+    text = data.decode('utf-8')
+    orig = text
+    modified = False
+
+    # Remove entire block comments that contain 'removed'
+    def block_repl(m):
+        nonlocal modified
+        content = m.group(0)
+        if 'removed' in content.lower() and removed_re.search(content):
+            modified = True
+            return ''
+        return content
+
+    if '/*' in text:
         text = block_re.sub(block_repl, text)
 
-        # Process lines for single-line comments
-        lines = text.splitlines()
-        out_lines = []
-        for line in lines:
+    # Process lines for single-line comments
+    lines = text.splitlines()
+    out_lines = []
+    for line in lines:
+        # Plain substring checks first; the word-boundary regex only confirms
+        m = removed_re.search(line) if '//' in line and 'removed' in line.lower() else None
+        if m:
             # If the line is a pure comment and contains removed -> drop
-            stripped = line.lstrip()
-            if stripped.startswith('//') and re.search(r'\bremoved\b', stripped, re.IGNORECASE):
+            if line.lstrip().startswith('//'):
                 modified = True
                 continue
-            # Else check for inline comment containing removed
-            if '//' in line and re.search(r'\bremoved\b', line, re.IGNORECASE):
-                # Find the first '//' before the 'removed' occurrence
-                m = re.search(r'\bremoved\b', line, re.IGNORECASE)
-                if m:
-                    rm_idx = m.start()
-                    # find the comment start before rm_idx
-                    comment_pos = line.rfind('//', 0, rm_idx)
-                    if comment_pos != -1:
-                        new_line = line[:comment_pos].rstrip()
-                        # If nothing left on line, drop it entirely
-                        if new_line.strip() == '':
-                            modified = True
-                            continue
-                        out_lines.append(new_line)
-                        modified = True
-                        continue
-            out_lines.append(line)
-
-        new_text = '\n'.join(out_lines) + ("\n" if text.endswith('\n') else '')
-        if new_text != orig:
-            path.write_text(new_text, encoding='utf-8')
-            changed_files.append(str(path.relative_to(ROOT)))
-
-print('Modified files:')
-for f in changed_files:
-    print(f)
-print('Total modified:', len(changed_files))
+            # Else find the comment start before the 'removed' occurrence
+            comment_pos = line.rfind('//', 0, m.start())
+            if comment_pos != -1:
+                new_line = line[:comment_pos].rstrip()
+                # If nothing left on line, drop it entirely
+                if new_line.strip() == '':
+                    modified = True
+                    continue
+                out_lines.append(new_line)
+                modified = True
+                continue
+        out_lines.append(line)
+
+    # Nothing matched, so there is nothing to rebuild or compare
+    if not modified:
+        return None
+
+    new_text = '\n'.join(out_lines) + ("\n" if text.endswith('\n') else '')
+    if new_text == orig:
+        return None
+    if not dry_run:
+        path.write_text(new_text, encoding='utf-8')
+    return str(path.relative_to(ROOT))
+
+
+def load_cache() -> dict:
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache: dict):
+    tmp = CACHE_FILE.with_suffix('.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp, CACHE_FILE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strip comments mentioning 'removed' from Swift sources")
+    parser.add_argument('--dry-run', action='store_true',
+                        help='List files that would change without writing them; exit 1 if any would')
+    args = parser.parse_args()
+
+    cache = load_cache()
+
+    # Only sweep files whose mtime changed since the last run
+    paths = []
+    for base in TARGET_DIRS:
+        for root, _dirs, files in os.walk(base):
+            for name in files:
+                if not name.endswith('.swift'):
+                    continue
+                full = os.path.join(root, name)
+                if cache.get(full) != os.stat(full, follow_symlinks=False).st_mtime_ns:
+                    paths.append(Path(full))
+
+    # Files are independent, so spread the read/regex/write work across cores
+    with ProcessPoolExecutor() as executor:
+        sweep = partial(process_file, dry_run=args.dry_run)
+        changed_files = [f for f in executor.map(sweep, paths, chunksize=32) if f]
+
+    # Record mtimes after any rewrites so swept files are skipped next time.
+    # A dry run is an audit and leaves the tree (cache included) untouched
+    if not args.dry_run:
+        for path in paths:
+            cache[str(path)] = os.stat(path, follow_symlinks=False).st_mtime_ns
+        save_cache(cache)
+
+    print('Would modify files:' if args.dry_run else 'Modified files:')
+    for f in changed_files:
+        print(f)
+    print('Total would modify:' if args.dry_run else 'Total modified:', len(changed_files))
+
+    if args.dry_run and changed_files:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
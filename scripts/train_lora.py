@@ -6,10 +6,102 @@ Based on Silicon-Studio implementation
 
 import sys
 import json
+import queue
 import argparse
+import threading
 from pathlib import Path
 
 
+def _available_ram_gb():
+    """Free plus inactive RAM in GB, matching psutil's "available" on macOS.
+    
+    Queries mach host_statistics64 directly to avoid importing psutil; falls
+    back to psutil on other platforms or if the call fails.
+    """
+    if sys.platform == "darwin":
+        try:
+            import ctypes
+            
+            libc = ctypes.CDLL("/usr/lib/libSystem.B.dylib")
+            page_size = ctypes.c_uint64(0)
+            size = ctypes.c_size_t(ctypes.sizeof(page_size))
+            if libc.sysctlbyname(b"hw.pagesize", ctypes.byref(page_size), ctypes.byref(size), None, 0) != 0:
+                raise OSError("sysctlbyname(hw.pagesize) failed")
+            
+            # vm_statistics64: free_count, active_count, inactive_count, ... (HOST_VM_INFO64_COUNT ints)
+            HOST_VM_INFO64, HOST_VM_INFO64_COUNT = 4, 38
+            stats = (ctypes.c_uint32 * HOST_VM_INFO64_COUNT)()
+            count = ctypes.c_uint32(HOST_VM_INFO64_COUNT)
+            libc.mach_host_self.restype = ctypes.c_uint32
+            if libc.host_statistics64(libc.mach_host_self(), HOST_VM_INFO64, stats, ctypes.byref(count)) != 0:
+                raise OSError("host_statistics64 failed")
+            
+            free_pages, inactive_pages = stats[0], stats[2]
+            return (free_pages + inactive_pages) * page_size.value / (1024**3)
+        except (OSError, AttributeError):
+            pass
+    
+    import psutil
+    return psutil.virtual_memory().available / (1024**3)
+
+
+class _JSONLineWriter:
+    """Write JSON records to stdout from a background thread.
+    
+    Keeps json.dumps and the flushed pipe write to Swift off the training loop.
+    The writer takes over stdout: anything else printed to sys.stdout after
+    construction (e.g. mlx_lm's "Iter ..." lines) goes to stderr, so JSON
+    lines are never interleaved with other output.
+    """
+    
+    def __init__(self, maxsize=1024):
+        self._stream = sys.stdout
+        sys.stdout = sys.stderr
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            self._stream.write(json.dumps(record) + "\n")
+            self._stream.flush()
+    
+    def emit(self, record, drop_if_full=False):
+        """Queue a record; progress updates may be dropped when the writer lags."""
+        if drop_if_full:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                pass
+        else:
+            self._queue.put(record)
+    
+    def close(self):
+        """Write out all queued records and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+
+class _IndexedView:
+    """Read-only view of a subset of an mlx_lm dataset, selected by index."""
+    
+    def __init__(self, base, indices):
+        self._base = base
+        self._indices = indices
+    
+    def __len__(self):
+        return len(self._indices)
+    
+    def __getitem__(self, idx):
+        return self._base[self._indices[idx]]
+    
+    def process(self, item):
+        return self._base.process(item)
+
+
 def main():
     parser = argparse.ArgumentParser(description='Train LoRA adapter using MLX')
     parser.add_argument('--model-path', required=True, help='Path to base model')
@@ -19,13 +111,21 @@ def main():
     parser.add_argument('--alpha', type=float, default=16.0, help='LoRA alpha')
     parser.add_argument('--lr', type=float, default=1e-4, help='Learning rate')
     parser.add_argument('--batch-size', type=int, default=4, help='Batch size')
+    parser.add_argument('--auto-batch', action='store_true',
+                        help='Double the batch size while estimated memory stays under 70%% of available RAM '
+                             '(max 64, at most the training set size) and cap the sequence length at the '
+                             '95th-percentile example length')
     parser.add_argument('--epochs', type=int, default=3, help='Number of epochs')
     parser.add_argument('--max-seq-length', type=int, default=2048, help='Max sequence length')
     parser.add_argument('--lora-layers', type=int, default=8, help='Number of layers to apply LoRA')
     parser.add_argument('--lora-dropout', type=float, default=0.0, help='LoRA dropout')
+    parser.add_argument('--progress-every', type=int, default=None,
+                        help='Report progress every N steps (default: about 100 reports per run)')
     
     args = parser.parse_args()
     
+    writer = _JSONLineWriter()
+    
     try:
         import mlx.core as mx
         import mlx.nn as nn
@@ -54,7 +154,10 @@ def main():
         
         if model_path.exists():
             print(f"   Loading from local path", file=sys.stderr)
-            model, tokenizer, model_config = load(str(model_path), return_config=True)
+            model, tokenizer = load(str(model_path))
+            # Read the config ourselves; return_config is not available in every mlx_lm version
+            with open(model_path / "config.json") as f:
+                model_config = json.load(f)
         else:
             print(f"   ERROR: Model path does not exist: {args.model_path}", file=sys.stderr)
             raise FileNotFoundError(f"Model not found at: {args.model_path}")
@@ -64,8 +167,7 @@ def main():
         print(f"✅ Model loaded and frozen", file=sys.stderr)
         
         # 1.5 Memory estimation and safety check
-        import psutil
-        available_ram_gb = psutil.virtual_memory().available / (1024**3)
+        available_ram_gb = _available_ram_gb()
         
         # Estimate adapter memory requirements
         # Formula: num_layers * rank * hidden_size * 4 projections * 2 (A and B matrices) * 4 bytes (float32)
@@ -91,13 +193,18 @@ def main():
         print(f"📊 Loading dataset...", file=sys.stderr)
         
         # MLX expects a directory with train.jsonl
-        # Copy our dataset file to a temp directory
+        # Link our dataset file into a temp directory instead of copying it
+        import os
         import shutil
         import tempfile
         
         temp_dir = tempfile.mkdtemp()
         temp_train_path = Path(temp_dir) / "train.jsonl"
-        shutil.copy(args.dataset, temp_train_path)
+        try:
+            os.link(args.dataset, temp_train_path)
+        except OSError:
+            # Hardlinks fail across volumes; a symlink works anywhere
+            os.symlink(os.path.abspath(args.dataset), temp_train_path)
         print(f"   Staged dataset to {temp_train_path}", file=sys.stderr)
         
         # Load dataset
@@ -107,22 +214,16 @@ def main():
         # Handle empty validation set
         if len(val_set) == 0:
             print(f"⚠️  Validation set empty, splitting train set...", file=sys.stderr)
-            if hasattr(train_set, "_data"):
-                raw_data = train_set._data
-            else:
-                raw_data = train_set
-                
-            if len(raw_data) > 1:
-                split_idx = int(len(raw_data) * 0.9)
-                if split_idx == len(raw_data):
-                    split_idx = len(raw_data) - 1
-                    
-                train_raw = raw_data[:split_idx]
-                val_raw = raw_data[split_idx:]
+            if len(train_set) > 1:
+                split_idx = int(len(train_set) * 0.9)
+                if split_idx == len(train_set):
+                    split_idx = len(train_set) - 1
                 
-                from mlx_lm.tuner.datasets import create_dataset
-                train_set = create_dataset(train_raw, tokenizer, model_config)
-                val_set = create_dataset(val_raw, tokenizer, model_config)
+                # Split by index over the already-built dataset rather than
+                # building two new datasets from the raw records
+                full_set = train_set
+                train_set = _IndexedView(full_set, range(split_idx))
+                val_set = _IndexedView(full_set, range(split_idx, len(full_set)))
             else:
                 print(f"   Dataset too small, using same for validation", file=sys.stderr)
                 val_set = train_set
@@ -133,8 +234,36 @@ def main():
         
         print(f"✅ Dataset loaded: {len(train_set)} train, {len(val_set)} val", file=sys.stderr)
         
+        batch_size = args.batch_size
+        max_seq_length = args.max_seq_length
+        if args.auto_batch:
+            # Pad to what the data actually needs: the 95th-percentile example
+            # length (the longest 5% are truncated), capped at --max-seq-length
+            lengths = []
+            for i in range(len(train_set)):
+                item = train_set[i]
+                lengths.append(len(item[0] if isinstance(item, tuple) else item))
+            lengths.sort()
+            if lengths:
+                p95_length = lengths[min(len(lengths) - 1, int(len(lengths) * 0.95))]
+                max_seq_length = max(1, min(max_seq_length, p95_length))
+            
+            # Small batches leave the GPU mostly idle, so grow the batch while
+            # the LoRA activations (float32, per sequence token) still fit.
+            # mlx_lm needs at least batch_size training examples
+            def batch_training_gb(bs):
+                activations_gb = (bs * max_seq_length * hidden_size * num_lora_layers * 4 * 4) / (1024**3)
+                return estimated_training_gb + activations_gb
+            
+            max_batch = min(64, len(train_set))
+            while batch_size * 2 <= max_batch and batch_training_gb(batch_size * 2) < available_ram_gb * 0.7:
+                batch_size *= 2
+            batch_size = max(1, min(batch_size, len(train_set)))
+            print(f"   Auto batch size: {batch_size}", file=sys.stderr)
+            print(f"   Max sequence length (p95): {max_seq_length}", file=sys.stderr)
+        
         # 3. Calculate training steps
-        steps_per_epoch = len(train_set) // args.batch_size
+        steps_per_epoch = len(train_set) // batch_size
         if steps_per_epoch < 1:
             steps_per_epoch = 1
         total_iters = steps_per_epoch * args.epochs
@@ -163,12 +292,18 @@ def main():
         print(f"✅ Model converted to LoRA", file=sys.stderr)
         
         # 5. Setup training
+        # Swift only needs periodic updates, so report about 100 times a run.
+        # mlx_lm only calls the loss callback every steps_per_report iterations
+        # (and on the last one), so that is where the interval has to be set
+        report_every = max(1, args.progress_every or total_iters // 100)
+        
         adapter_file = output_dir / "adapters.safetensors"
         training_args = TrainingArgs(
-            batch_size=args.batch_size,
+            batch_size=batch_size,
             iters=total_iters,
+            steps_per_report=report_every,
             adapter_file=str(adapter_file),
-            max_seq_length=args.max_seq_length
+            max_seq_length=max_seq_length
         )
         
         optimizer = optim.Adam(learning_rate=args.lr)
@@ -182,20 +317,20 @@ def main():
                     progress = int((step / total_iters) * 100)
                     
                     # Output JSON progress for Swift to parse
-                    print(json.dumps({
+                    writer.emit({
                         "type": "progress",
                         "step": step,
                         "total_steps": total_iters,
                         "loss": loss,
                         "progress": progress
-                    }), flush=True)
+                    }, drop_if_full=True)
                     
             def on_val_loss_report(self, val_info):
                 if "val_loss" in val_info:
-                    print(json.dumps({
+                    writer.emit({
                         "type": "validation",
                         "loss": val_info["val_loss"]
-                    }), flush=True)
+                    })
         
         callback = ProgressCallback()
         
@@ -234,10 +369,11 @@ def main():
         shutil.rmtree(temp_dir)
         
         # Output success
-        print(json.dumps({
+        writer.emit({
             "type": "complete",
             "adapter_path": str(adapter_file)
-        }), flush=True)
+        })
+        writer.close()
         
         return 0
         
@@ -245,10 +381,11 @@ def main():
         import traceback
         print(f"❌ Training failed: {e}", file=sys.stderr)
         traceback.print_exc(file=sys.stderr)
-        print(json.dumps({
+        writer.emit({
             "type": "error",
             "error": str(e)
-        }), flush=True)
+        })
+        writer.close()
         return 1
 
 
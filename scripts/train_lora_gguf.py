@@ -4,12 +4,164 @@ LoRA Training Script for SAM using Hugging Face Transformers + PEFT
 Trains GGUF models by loading from Hugging Face, applying LoRA, merging weights, and converting to GGUF
 """
 
+import os
 import sys
 import json
+import math
+import time
 import argparse
 import subprocess
 from pathlib import Path
 
+# orjson encodes several times faster when it's installed
+try:
+    import orjson
+    
+    def dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def dumps(obj):
+        return json.dumps(obj, separators=(",", ":"))
+
+# Log records go through our own buffer on stderr's fd instead of the
+# line-buffered sys.stderr, so bursts of records cost one write, not one each
+_log_stream = open(sys.stderr.fileno(), "w", encoding="utf-8", buffering=1 << 16, closefd=False)
+
+# Output types convert_hf_to_gguf.py can write directly; anything else
+# (K-quants, I-quants) needs a second pass through llama-quantize
+CONVERT_OUTTYPES = {"f32", "f16", "bf16", "q8_0", "tq1_0", "tq2_0", "auto"}
+
+# Output types convert_lora_to_gguf.py supports for adapters
+LORA_OUTTYPES = {"f32", "f16", "bf16", "q8_0"}
+
+
+def configure_cpu_threads():
+    """
+    Size torch's CPU thread pools to the physical cores.
+    
+    cpu_count() counts SMT threads, and oversubscribing them mostly adds
+    context switches. OMP_NUM_THREADS, if set, wins.
+    """
+    import torch
+    
+    omp_threads = os.environ.get("OMP_NUM_THREADS", "")
+    if omp_threads.isdigit() and int(omp_threads) > 0:
+        threads = int(omp_threads)
+    else:
+        threads = max(1, (os.cpu_count() or 2) // 2)
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only settable before the first inter-op parallel work
+        pass
+    torch.backends.mkldnn.enabled = True
+    return threads
+
+
+def find_llama_quantize(llama_cpp_dir: Path):
+    """Locate the llama-quantize binary from a llama.cpp build or PATH."""
+    import shutil
+    
+    candidates = [
+        llama_cpp_dir / "build" / "bin" / "llama-quantize",
+        llama_cpp_dir / "build-macos" / "bin" / "Release" / "llama-quantize",
+        llama_cpp_dir / "build-macos" / "bin" / "llama-quantize",
+    ]
+    for candidate in candidates:
+        if candidate.exists():
+            return candidate
+    found = shutil.which("llama-quantize")
+    return Path(found) if found else None
+
+
+def log(message, flush=True):
+    """Write a JSON log record to stderr; flush=False leaves it buffered."""
+    _log_stream.write(dumps({"type": "log", "message": message}) + "\n")
+    if flush:
+        _log_stream.flush()
+
+
+def run_streaming(cmd, label):
+    """Run cmd, forwarding each output line to stderr as a JSON log record."""
+    log(f"Running: {' '.join(cmd)}")
+    
+    # Stream output as it runs instead of buffering it all
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
+    )
+    # Converter output can be thousands of lines; flush a few times a second
+    last_flush = time.monotonic()
+    for line in process.stdout:
+        line = line.rstrip()
+        if line:
+            log(f"{label}: {line}", flush=False)
+            if time.monotonic() - last_flush > 0.25:
+                _log_stream.flush()
+                last_flush = time.monotonic()
+    _log_stream.flush()
+    returncode = process.wait()
+    
+    if returncode != 0:
+        raise RuntimeError(f"{label} failed with exit code {returncode}")
+
+
+def advise_page_cache(paths, advice):
+    """
+    Pass the named posix_fadvise hint (e.g. "POSIX_FADV_WILLNEED") for whole files.
+    
+    No-op where posix_fadvise isn't available (macOS): F_NOCACHE there is
+    per descriptor and wouldn't reach the converter subprocess.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for path in paths:
+        fd = os.open(str(path), os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+        finally:
+            os.close(fd)
+
+
+def fold_rslora_scaling(adapter_dir: Path):
+    """
+    Rewrite a saved rsLoRA adapter config so plain-LoRA consumers scale it right.
+    
+    rsLoRA scales updates by alpha / sqrt(r), but convert_lora_to_gguf.py copies
+    lora_alpha as is and llama.cpp applies alpha / r. Storing alpha * sqrt(r)
+    with use_rslora off gives the same effective scale in llama.cpp and PEFT.
+    """
+    config_path = adapter_dir / "adapter_config.json"
+    config = json.loads(config_path.read_text())
+    if not config.get("use_rslora"):
+        return
+    config["lora_alpha"] = config["lora_alpha"] * math.sqrt(config["r"])
+    config["use_rslora"] = False
+    config_path.write_text(json.dumps(config, indent=2))
+
+
+def report_complete(gguf_path: Path, model_path: Path):
+    """Check the GGUF file exists and print the completion record."""
+    if not gguf_path.exists():
+        raise FileNotFoundError(f"GGUF file not created at {gguf_path}")
+    
+    gguf_size_mb = gguf_path.stat().st_size / (1024 * 1024)
+    log(f"GGUF model created: {gguf_size_mb:.1f} MB")
+    
+    # Output success
+    print(dumps({
+        "type": "complete",
+        "gguf_path": str(gguf_path),
+        "merged_path": str(model_path),
+        "size_mb": gguf_size_mb
+    }), flush=True)
+    
+    return 0
+
 
 def main():
     parser = argparse.ArgumentParser(description='Train LoRA adapter for GGUF models')
@@ -17,29 +169,42 @@ def main():
     parser.add_argument('--dataset', required=True, help='Path to training dataset (JSONL)')
     parser.add_argument('--output', required=True, help='Output directory for merged model')
     parser.add_argument('--gguf-output', required=True, help='Path for final GGUF model')
-    parser.add_argument('--rank', type=int, default=8, help='LoRA rank')
+    parser.add_argument('--rank', type=int, default=16, help='LoRA rank')
     parser.add_argument('--alpha', type=float, default=16.0, help='LoRA alpha')
+    parser.add_argument('--target-modules', type=str,
+                        default='q_proj,k_proj,v_proj,o_proj,gate_proj,up_proj,down_proj',
+                        help='Comma-separated modules to apply LoRA to (attention and MLP by default)')
     parser.add_argument('--lr', type=float, default=2e-4, help='Learning rate')
     parser.add_argument('--batch-size', type=int, default=1, help='Batch size')
     parser.add_argument('--epochs', type=int, default=3, help='Number of epochs')
     parser.add_argument('--max-seq-length', type=int, default=2048, help='Max sequence length')
     parser.add_argument('--gradient-accumulation-steps', type=int, default=4, help='Gradient accumulation steps')
+    parser.add_argument('--qlora', action='store_true',
+                        help='Train against a 4-bit NF4 quantized base model (requires CUDA and bitsandbytes)')
+    parser.add_argument('--packing', action=argparse.BooleanOptionalAction, default=True,
+                        help='Pack short examples into full-length sequences instead of padding each one')
+    parser.add_argument('--compile', action='store_true',
+                        help='Compile the model with torch.compile for training (CUDA only)')
+    parser.add_argument('--adapter-only', action='store_true',
+                        help='Write only the LoRA adapter as GGUF (applied at load time with llama.cpp --lora) '
+                             'instead of merging and converting the full model')
     parser.add_argument('--quantization', type=str, default='f16', help='GGUF quantization type (f16, q4_k_m, q8_0, etc.)')
+    parser.add_argument('--imatrix', type=str, default=None,
+                        help='Importance matrix file passed to llama-quantize for K-/I-quants')
     
     args = parser.parse_args()
     
     try:
         import torch
-        from transformers import AutoModelForCausalLM, AutoTokenizer, TrainingArguments
-        from peft import LoraConfig, get_peft_model
-        from trl import SFTTrainer
-        from datasets import Dataset
-        import os
+        from transformers import AutoModelForCausalLM, AutoTokenizer, TrainerCallback
+        from peft import LoraConfig, PeftModel, get_peft_model, prepare_model_for_kbit_training
+        from trl import SFTConfig, SFTTrainer
+        from datasets import load_dataset
         
-        print(json.dumps({"type": "log", "message": "Starting LoRA training for GGUF model"}), file=sys.stderr, flush=True)
-        print(json.dumps({"type": "log", "message": f"Hugging Face Model: {args.hf_model_id}"}), file=sys.stderr, flush=True)
-        print(json.dumps({"type": "log", "message": f"Dataset: {args.dataset}"}), file=sys.stderr, flush=True)
-        print(json.dumps({"type": "log", "message": f"Output: {args.output}"}), file=sys.stderr, flush=True)
+        log("Starting LoRA training for GGUF model")
+        log(f"Hugging Face Model: {args.hf_model_id}")
+        log(f"Dataset: {args.dataset}")
+        log(f"Output: {args.output}")
         
         # Create output directory
         output_dir = Path(args.output)
@@ -47,49 +212,96 @@ def main():
         
         # Merged model will be saved to output-merged/
         merged_dir = Path(f"{args.output}-merged")
-        merged_dir.mkdir(parents=True, exist_ok=True)
+        if not args.adapter_only:
+            merged_dir.mkdir(parents=True, exist_ok=True)
         
         # 1. Load training data
-        print(json.dumps({"type": "log", "message": "Loading training data"}), file=sys.stderr, flush=True)
-        
-        with open(args.dataset, 'r') as f:
-            # SAM exports JSONL with {"text": "..."} format (same as MLX training)
-            data = [json.loads(line) for line in f if line.strip()]
+        log("Loading training data")
+        
+        # SAM exports JSONL with {"text": "..."} format (same as MLX training).
+        # The parsed Arrow table is cached under the output directory and
+        # memory-mapped, so repeat runs on the same export skip the JSON parse
+        dataset = load_dataset(
+            "json",
+            data_files=args.dataset,
+            split="train",
+            cache_dir=str(output_dir / ".hf_cache"),
+            keep_in_memory=False,
+        )
         
-        if not data:
+        if len(dataset) == 0:
             raise ValueError("No training data found in dataset")
         
-        dataset = Dataset.from_list(data)
-        print(json.dumps({"type": "log", "message": f"Loaded {len(data)} training examples"}), file=sys.stderr, flush=True)
+        log(f"Loaded {len(dataset)} training examples")
         
         # 2. Load model and tokenizer from Hugging Face
-        print(json.dumps({"type": "log", "message": f"Downloading model from Hugging Face: {args.hf_model_id}"}), file=sys.stderr, flush=True)
+        log(f"Downloading model from Hugging Face: {args.hf_model_id}")
         
         tokenizer = AutoTokenizer.from_pretrained(args.hf_model_id, trust_remote_code=True)
         if tokenizer.pad_token is None:
             tokenizer.pad_token = tokenizer.eos_token
         
-        # Load model in FP32 for CPU training (or FP16 if GPU available)
+        # Train on the GPU when there is one; CPU stays FP32
+        if torch.cuda.is_available():
+            device = "cuda"
+        elif torch.backends.mps.is_available():
+            device = "mps"
+        else:
+            device = "cpu"
+        use_bf16 = device == "cuda" and torch.cuda.is_bf16_supported()
+        use_fp16 = device == "cuda" and not use_bf16
+        log(f"Training device: {device}")
+        if device == "cpu":
+            threads = configure_cpu_threads()
+            log(f"CPU threads: {threads}")
+        
+        if args.qlora and device != "cuda":
+            raise ValueError("--qlora requires a CUDA GPU")
+        if args.compile and device != "cuda":
+            log("--compile is only used on CUDA; training eagerly")
+        
+        # Load model in BF16/FP16 on CUDA, FP32 otherwise
         # Use low_cpu_mem_usage to reduce memory during loading
+        model_dtype = torch.bfloat16 if use_bf16 else (torch.float16 if use_fp16 else torch.float32)
+        quantization_kwargs = {}
+        if args.qlora:
+            # 4-bit NF4 base weights; LoRA adapters still train in model_dtype
+            from transformers import BitsAndBytesConfig
+            quantization_kwargs = {
+                "quantization_config": BitsAndBytesConfig(
+                    load_in_4bit=True,
+                    bnb_4bit_quant_type="nf4",
+                    bnb_4bit_compute_dtype=model_dtype,
+                    bnb_4bit_use_double_quant=True,
+                ),
+                "device_map": {"": 0},
+            }
         model = AutoModelForCausalLM.from_pretrained(
             args.hf_model_id,
             trust_remote_code=True,
-            torch_dtype=torch.float32,
+            torch_dtype=model_dtype,
             low_cpu_mem_usage=True,
+            **quantization_kwargs,
         )
+        # KV cache is useless during training and conflicts with gradient checkpointing
+        model.config.use_cache = False
+        if args.qlora:
+            model = prepare_model_for_kbit_training(model, use_gradient_checkpointing=True)
         
-        print(json.dumps({"type": "log", "message": "Model loaded successfully"}), file=sys.stderr, flush=True)
+        log("Model loaded successfully")
         
         # 3. Configure LoRA
-        print(json.dumps({"type": "log", "message": f"Configuring LoRA (rank={args.rank}, alpha={args.alpha})"}), file=sys.stderr, flush=True)
+        log(f"Configuring LoRA (rank={args.rank}, alpha={args.alpha})")
         
         lora_config = LoraConfig(
             r=args.rank,
             lora_alpha=args.alpha,
-            target_modules=["q_proj", "k_proj", "v_proj", "o_proj"],  # Attention layers
+            target_modules=[m.strip() for m in args.target_modules.split(",") if m.strip()],
             lora_dropout=0.05,
             bias="none",
             task_type="CAUSAL_LM",
+            # Rank-stabilized scaling (alpha / sqrt(r)) keeps updates comparable across ranks
+            use_rslora=True,
         )
         
         model = get_peft_model(model, lora_config)
@@ -97,125 +309,215 @@ def main():
         # Print trainable parameters
         trainable_params = sum(p.numel() for p in model.parameters() if p.requires_grad)
         total_params = sum(p.numel() for p in model.parameters())
-        print(json.dumps({
-            "type": "log",
-            "message": f"Trainable params: {trainable_params:,} / {total_params:,} ({100 * trainable_params / total_params:.2f}%)"
-        }), file=sys.stderr, flush=True)
-        
-        # 4. Format dataset for training
-        # SAM uses {"text": "..."} format - convert to plain text for SFTTrainer
-        def format_text(example):
-            return {"text": example["text"]}
+        log(f"Trainable params: {trainable_params:,} / {total_params:,} ({100 * trainable_params / total_params:.2f}%)")
         
-        formatted_dataset = dataset.map(format_text)
+        # 4. Dataset stays as text: SAM uses {"text": "..."} format, and
+        # SFTTrainer tokenizes (and packs) that column itself, in parallel
         
         # 5. Training arguments
-        print(json.dumps({"type": "log", "message": "Setting up training"}), file=sys.stderr, flush=True)
+        log("Setting up training")
         
-        training_args = TrainingArguments(
+        training_args = SFTConfig(
             output_dir=str(output_dir),
             num_train_epochs=args.epochs,
             per_device_train_batch_size=args.batch_size,
             gradient_accumulation_steps=args.gradient_accumulation_steps,
             learning_rate=args.lr,
-            save_strategy="epoch",
+            # Only the merged model at the end is kept; no per-epoch checkpoints
+            save_strategy="no",
             logging_steps=10,
             warmup_steps=10,
             report_to="none",
-            use_cpu=True,  # Force CPU (MPS/CUDA can be enabled later if needed)
+            use_cpu=device == "cpu",
+            bf16=use_bf16,
+            fp16=use_fp16,
+            # Fused AdamW kernels are CUDA-only
+            optim="adamw_torch_fused" if device == "cuda" else "adamw_torch",
+            gradient_checkpointing=True,
+            gradient_checkpointing_kwargs={"use_reentrant": False},
+            dataloader_pin_memory=device == "cuda",
+            # Collate batches in worker processes kept alive across epochs on CUDA.
+            # Elsewhere (macOS spawns workers) they only add startup cost and
+            # duplicate the dataset in memory, so load in-process
+            dataloader_num_workers=max(2, (os.cpu_count() or 4) // 4) if device == "cuda" else 0,
+            dataloader_persistent_workers=device == "cuda",
+            # A short final batch would force a recompile of the compiled model
+            dataloader_drop_last=args.compile,
+            # Packing concatenates examples into dense blocks rather than
+            # padding each one; length grouping would defeat it
+            packing=args.packing,
+            group_by_length=False,
+            dataset_text_field="text",
+            dataset_num_proc=max(1, min((os.cpu_count() or 2) - 1, len(dataset) // 1000)),
+            # Inductor kernels fuse the LoRA projections into the base matmuls;
+            # the Trainer compiles its own wrapper so the PEFT model stays mergeable
+            torch_compile=args.compile and device == "cuda",
         )
+        # Renamed from max_seq_length to max_length in newer trl releases
+        if hasattr(training_args, "max_length"):
+            training_args.max_length = args.max_seq_length
+        else:
+            training_args.max_seq_length = args.max_seq_length
         
         # 6. Create trainer
+        # The tokenizer argument was renamed to processing_class in trl 0.12
+        import inspect
+        tokenizer_kwarg = ("processing_class" if "processing_class" in inspect.signature(SFTTrainer.__init__).parameters
+                           else "tokenizer")
+        
+        class ProgressCallback(TrainerCallback):
+            # Packing changes the number of sequences, so the step count is
+            # only known once the Trainer has built its dataloader
+            def on_train_begin(self, args, state, control, **kwargs):
+                print(dumps({"type": "progress", "step": 0, "total_steps": state.max_steps, "loss": 0.0, "progress": 0}), flush=True)
+        
+        log("Tokenizing dataset")
+        # No data_collator: SFTTrainer picks the one matching packing (packed
+        # blocks, or padded batches with causal-LM labels)
         trainer = SFTTrainer(
             model=model,
-            train_dataset=formatted_dataset,
+            train_dataset=dataset,
             args=training_args,
-            formatting_func=lambda x: x["text"],
+            callbacks=[ProgressCallback()],
+            **{tokenizer_kwarg: tokenizer},
         )
         
         # 7. Train!
-        print(json.dumps({"type": "log", "message": f"Starting training for {args.epochs} epochs"}), file=sys.stderr, flush=True)
-        print(json.dumps({"type": "progress", "step": 0, "total_steps": len(formatted_dataset) * args.epochs, "loss": 0.0, "progress": 0}), flush=True)
+        log(f"Starting training for {args.epochs} epochs")
         
         trainer.train()
         
-        print(json.dumps({"type": "log", "message": "Training complete"}), file=sys.stderr, flush=True)
-        
-        # 8. Save LoRA adapter
-        print(json.dumps({"type": "log", "message": "Saving LoRA adapter"}), file=sys.stderr, flush=True)
-        trainer.model.save_pretrained(str(output_dir))
-        tokenizer.save_pretrained(str(output_dir))
+        log("Training complete")
+        
+        # 8. Save LoRA adapter (only when it's converted on its own, or for QLoRA
+        # where the merge below reloads it onto a full-precision base; otherwise
+        # the in-memory weights are merged directly)
+        if args.adapter_only or args.qlora:
+            log("Saving LoRA adapter")
+            trainer.model.save_pretrained(str(output_dir))
+            # Keep the adapter directory loadable on its own
+            tokenizer.save_pretrained(str(output_dir))
+        
+        if args.adapter_only:
+            # Convert just the adapter; skips materialising, saving and
+            # re-reading the full merged model
+            conversion_script = Path(__file__).parent.parent / "external" / "llama.cpp" / "convert_lora_to_gguf.py"
+            if not conversion_script.exists():
+                raise FileNotFoundError(f"llama.cpp conversion script not found at {conversion_script}")
+            
+            quantization = args.quantization.lower()
+            if quantization not in LORA_OUTTYPES:
+                log(f"{args.quantization} is not available for adapters; writing f16")
+                quantization = "f16"
+            
+            # llama.cpp has no rsLoRA scaling; bake it into lora_alpha
+            fold_rslora_scaling(output_dir)
+            
+            log("Converting LoRA adapter to GGUF")
+            run_streaming([
+                sys.executable,
+                str(conversion_script),
+                str(output_dir),
+                "--base-model-id", args.hf_model_id,
+                "--outfile", args.gguf_output,
+                "--outtype", quantization
+            ], "GGUF adapter conversion")
+            
+            return report_complete(Path(args.gguf_output), output_dir)
         
         # 9. Merge LoRA weights into base model
-        print(json.dumps({"type": "log", "message": "Merging LoRA weights into base model"}), file=sys.stderr, flush=True)
+        log("Merging LoRA weights into base model")
+        
+        # Drop the trainer (and its optimizer state) before merging so it
+        # doesn't sit in memory alongside the merged weights
+        del trainer
+        import gc
+        gc.collect()
+        
+        if args.qlora:
+            # Merging into 4-bit weights would produce a quantized checkpoint the
+            # GGUF converter can't read; re-attach the adapter to a full-precision base
+            del model
+            gc.collect()
+            torch.cuda.empty_cache()
+            base_model = AutoModelForCausalLM.from_pretrained(
+                args.hf_model_id,
+                trust_remote_code=True,
+                torch_dtype=model_dtype,
+                low_cpu_mem_usage=True,
+            )
+            model = PeftModel.from_pretrained(base_model, str(output_dir))
         
         model = model.merge_and_unload()
         
         # 10. Save merged model
-        print(json.dumps({"type": "log", "message": f"Saving merged model to {merged_dir}"}), file=sys.stderr, flush=True)
+        log(f"Saving merged model to {merged_dir}")
         
-        model.save_pretrained(str(merged_dir), safe_serialization=True)
+        model.save_pretrained(str(merged_dir), safe_serialization=True, max_shard_size="2GB")
+        del model
+        gc.collect()
         tokenizer.save_pretrained(str(merged_dir))
         
-        print(json.dumps({"type": "log", "message": "Merged model saved"}), file=sys.stderr, flush=True)
+        # The converter reads the shards straight back; keep them in the page cache
+        merged_shards = list(merged_dir.glob("*.safetensors"))
+        advise_page_cache(merged_shards, "POSIX_FADV_WILLNEED")
+        
+        log("Merged model saved")
         
         # 11. Convert to GGUF using llama.cpp
-        print(json.dumps({"type": "log", "message": "Converting merged model to GGUF"}), file=sys.stderr, flush=True)
+        log("Converting merged model to GGUF")
         
         # Find llama.cpp conversion script
         script_dir = Path(__file__).parent.parent
-        conversion_script = script_dir / "external" / "llama.cpp" / "convert_hf_to_gguf.py"
+        llama_cpp_dir = script_dir / "external" / "llama.cpp"
+        conversion_script = llama_cpp_dir / "convert_hf_to_gguf.py"
         
         if not conversion_script.exists():
             raise FileNotFoundError(f"llama.cpp conversion script not found at {conversion_script}")
         
+        quantization = args.quantization.lower()
+        needs_quantize = quantization not in CONVERT_OUTTYPES
+        llama_quantize = None
+        if needs_quantize:
+            llama_quantize = find_llama_quantize(llama_cpp_dir)
+            if llama_quantize is None:
+                raise FileNotFoundError(f"llama-quantize not found (needed for {args.quantization})")
+        
+        # K-/I-quants are produced from an intermediate f16 GGUF
+        convert_output = f"{args.gguf_output}.f16.gguf" if needs_quantize else args.gguf_output
+        
         # Run conversion
         conversion_cmd = [
             sys.executable,  # Use same Python interpreter
             str(conversion_script),
             str(merged_dir),
-            "--outfile", args.gguf_output,
-            "--outtype", args.quantization
+            "--outfile", convert_output,
+            "--outtype", "f16" if needs_quantize else quantization
         ]
-        
-        print(json.dumps({"type": "log", "message": f"Running: {' '.join(conversion_cmd)}"}), file=sys.stderr, flush=True)
-        
-        result = subprocess.run(
-            conversion_cmd,
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            print(json.dumps({"type": "log", "message": f"Conversion stdout: {result.stdout}"}), file=sys.stderr, flush=True)
-            print(json.dumps({"type": "log", "message": f"Conversion stderr: {result.stderr}"}), file=sys.stderr, flush=True)
-            raise RuntimeError(f"GGUF conversion failed with exit code {result.returncode}")
-        
-        print(json.dumps({"type": "log", "message": "GGUF conversion complete"}), file=sys.stderr, flush=True)
+        run_streaming(conversion_cmd, "GGUF conversion")
+        # Done with the safetensors; let the kernel reclaim their pages
+        advise_page_cache(merged_shards, "POSIX_FADV_DONTNEED")
+        
+        if needs_quantize:
+            quantize_cmd = [str(llama_quantize)]
+            if args.imatrix:
+                quantize_cmd += ["--imatrix", args.imatrix]
+            quantize_cmd += [convert_output, args.gguf_output, quantization.upper()]
+            try:
+                run_streaming(quantize_cmd, "GGUF quantization")
+            finally:
+                Path(convert_output).unlink(missing_ok=True)
+        
+        log("GGUF conversion complete")
         
         # 12. Verify GGUF file was created
-        gguf_path = Path(args.gguf_output)
-        if not gguf_path.exists():
-            raise FileNotFoundError(f"GGUF file not created at {gguf_path}")
-        
-        gguf_size_mb = gguf_path.stat().st_size / (1024 * 1024)
-        print(json.dumps({"type": "log", "message": f"GGUF model created: {gguf_size_mb:.1f} MB"}), file=sys.stderr, flush=True)
-        
-        # Output success
-        print(json.dumps({
-            "type": "complete",
-            "gguf_path": str(gguf_path),
-            "merged_path": str(merged_dir),
-            "size_mb": gguf_size_mb
-        }), flush=True)
-        
-        return 0
+        return report_complete(Path(args.gguf_output), merged_dir)
         
     except Exception as e:
         import traceback
-        print(json.dumps({"type": "log", "message": f"Training failed: {e}"}), file=sys.stderr, flush=True)
+        log(f"Training failed: {e}")
         traceback.print_exc(file=sys.stderr)
-        print(json.dumps({
+        print(dumps({
             "type": "error",
             "error": str(e)
         }), flush=True)